@@ -0,0 +1,217 @@
+from fastapi.dependencies.utils import request_params_to_args
+from fastapi.responses import JSONResponse, Response
+from starlette.routing import Match
+from collections import OrderedDict, deque
+import asyncio
+import json
+import math
+import time
+
+# Per-route-family admission: bounded concurrency, a bounded FIFO queue and a
+# deadline on how long a request may wait for a slot.
+class AdmissionLimiter:
+    def __init__(self, name, max_concurrent, max_queue, max_wait, degradable=False, wait_for=asyncio.wait_for):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_wait = max_wait # seconds a request may wait for a slot
+        self.degradable = degradable # serve cached/popular results instead of 429
+
+        self.in_flight = 0
+        self.admitted = 0
+        self.shed = 0
+        self.degraded = 0
+        self.avg_service_time = 0.05 # EWMA, seconds
+        self._waiters = deque() # FIFO of futures waiting for a slot
+        self.wait_for = wait_for # swappable so tests can force the timeout/cancel races
+
+    @property
+    def queued(self):
+        return len(self._waiters)
+
+    def estimated_wait(self):
+        if self.in_flight < self.max_concurrent:
+            return 0.0
+        # everyone queued ahead of us, drained max_concurrent at a time
+        return (self.queued + 1) * self.avg_service_time / self.max_concurrent
+
+    def retry_after(self):
+        return max(1, math.ceil(self.estimated_wait()))
+
+    # only ever called from the event loop, so the counters need no locking
+    async def acquire(self):
+        if self.in_flight < self.max_concurrent and not self._waiters:
+            self.in_flight += 1
+            self.admitted += 1
+            return True
+
+        # reject up front if the queue is full or we'd miss the deadline anyway
+        if self.queued >= self.max_queue or self.estimated_wait() > self.max_wait:
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await self.wait_for(waiter, timeout=self.max_wait)
+        except asyncio.TimeoutError:
+            pass
+        except asyncio.CancelledError:
+            # client went away after being handed a slot, pass it on
+            if waiter.done() and not waiter.cancelled():
+                self._free_slot()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+        if waiter.done() and not waiter.cancelled():
+            self.admitted += 1
+            return True
+        return False
+
+    def release(self, service_time):
+        self.avg_service_time = 0.8 * self.avg_service_time + 0.2 * service_time
+        self._free_slot()
+
+    def _free_slot(self):
+        # hand the slot straight to the next live waiter, in_flight stays the same
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+    def stats(self):
+        return {
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "max_wait_s": self.max_wait,
+            "admitted": self.admitted,
+            "shed": self.shed,
+            "degraded": self.degraded,
+            "avg_service_ms": round(self.avg_service_time * 1000, 2)
+        }
+
+class ResponseCache:
+    # LRU of raw response bodies, keyed by path + query string
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        body = self._entries.get(key)
+        if body is not None:
+            self._entries.move_to_end(key)
+        return body
+
+    def put(self, key, body):
+        self._entries[key] = body
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+def response_cache_key(request):
+    return f"{request.url.path}?{request.url.query}"
+
+def get_admission_limiter(limiters, path):
+    for prefix, limiter in limiters:
+        if path.startswith(prefix):
+            return limiter
+    return None
+
+def match_route_params(request):
+    # runs before routing, so resolve the route and validate its path/query params
+    # the way FastAPI will; None means the request fails on its own (404/405/422)
+    for route in request.app.router.routes:
+        match, child_scope = route.matches(request.scope)
+        dependant = getattr(route, "dependant", None)
+        if match != Match.FULL or dependant is None:
+            continue
+        path_values, path_errors = request_params_to_args(
+            dependant.path_params, child_scope.get("path_params", {})
+        )
+        query_values, query_errors = request_params_to_args(
+            dependant.query_params, request.query_params
+        )
+        if path_errors or query_errors:
+            return None
+        return {**path_values, **query_values}
+    return None
+
+def degraded_recommendations(request, cache, popular_items, params):
+    body = cache.get(response_cache_key(request))
+    if body is not None:
+        payload = json.loads(body)
+        payload["degraded"] = True
+        payload["degraded_source"] = "cache"
+        return payload
+
+    # never recommend the item a /context/{item_id} request is about
+    context_id = params.get("item_id")
+    candidates = [item for item in popular_items if item["itemId"] != context_id]
+    return {
+        "recommendations": candidates[:max(params.get("k", 10), 0)],
+        "degraded": True,
+        "degraded_source": "popularity"
+    }
+
+def admission_middleware(limiters, cache, get_popular_items, is_servable=lambda request: True):
+    # limiters: [(path prefix, AdmissionLimiter)], first match wins.
+    # get_popular_items is called lazily, the pool is only built at startup.
+    # is_servable(request) says whether the backing model is loaded.
+    async def admission_control(request, call_next):
+        limiter = get_admission_limiter(limiters, request.url.path)
+        if limiter is None:
+            return await call_next(request)
+
+        params = None
+        if limiter.degradable:
+            params = match_route_params(request)
+            if params is None or not is_servable(request):
+                # unknown route, bad params or unloaded model: it fails fast with its
+                # normal 404/422/503 and never runs a model, so don't admit or degrade it
+                return await call_next(request)
+
+        if not await limiter.acquire():
+            if limiter.degradable:
+                limiter.degraded += 1
+                return JSONResponse(degraded_recommendations(request, cache, get_popular_items(), params))
+            limiter.shed += 1
+            return JSONResponse(
+                {"detail": f"Server overloaded ({limiter.name}), retry later"},
+                status_code=429,
+                headers={"Retry-After": str(limiter.retry_after())}
+            )
+
+        start = time.perf_counter()
+        try:
+            response = await call_next(request)
+        finally:
+            limiter.release(time.perf_counter() - start)
+
+        if limiter.degradable and response.status_code == 200:
+            body = b"".join([chunk async for chunk in response.body_iterator])
+            cache.put(response_cache_key(request), body)
+            return Response(
+                content=body,
+                status_code=response.status_code,
+                headers=dict(response.headers),
+                media_type=response.media_type
+            )
+
+        return response
+
+    return admission_control
+
+def admission_stats(limiters, cache, popular_items):
+    return {
+        "families": {limiter.name: limiter.stats() for _, limiter in limiters},
+        "cached_responses": len(cache),
+        "popular_items": len(popular_items)
+    }
@@ -2,6 +2,7 @@ import pandas as pd
 import sqlite3
 import os
 from dotenv import load_dotenv
+from search import build_search_documents, sync_search_index
 
 load_dotenv()
 
@@ -25,5 +26,15 @@ cursor.execute("CREATE INDEX idx_item_id ON items(itemId);")
 cursor.execute("CREATE INDEX idx_review_item_id ON reviews(itemId);")
 cursor.execute("CREATE INDEX idx_user_id ON reviews(userId);")
 
+# == SEARCH INDEX ==
+
+# The items table is replaced on every run, but the search index is kept and
+# updated incrementally.
+documents = build_search_documents(
+    df_items[["itemId", "name", "brandName", "category"]].fillna("").itertuples(index=False)
+)
+upserted, removed = sync_search_index(conn, documents)
+print(f"Search index updated: {upserted} upserted, {removed} removed.")
+
 conn.close()
 print("Database created successfully!")
\ No newline at end of file
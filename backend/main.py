@@ -1,8 +1,9 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query
 from contextlib import asynccontextmanager
 from fastapi.middleware.cors import CORSMiddleware
 from sklearn.metrics.pairwise import cosine_similarity
 from surprise import dump
+from typing import Optional
 import torch.nn.functional as F
 import torch.nn as nn
 import numpy as np
@@ -13,6 +14,8 @@ import math
 import ast
 import os
 from dotenv import load_dotenv
+from search import build_fts_query, decode_cursor, encode_cursor, search_items
+from admission import AdmissionLimiter, ResponseCache, admission_middleware, admission_stats
 
 load_dotenv()
 
@@ -148,12 +151,65 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         print(f"Failed to load CBF model: {e}")
         ml_models["cbf"] = None
+
+    print("Precomputing popular items...")
+    try:
+        conn = get_db_connection()
+        # items.csv repeats itemIds (one row per category), so rank distinct items
+        rows = conn.execute(
+            """
+            SELECT * FROM items
+            GROUP BY itemId
+            ORDER BY MAX(totalReviews) DESC, MAX(averageRating) DESC
+            LIMIT ?
+            """,
+            (POPULAR_POOL_SIZE,)
+        ).fetchall()
+        conn.close()
+        ml_models["popular_items"] = [dict(row) for row in rows]
+        print(f"Cached {len(ml_models['popular_items'])} popular items.")
+    except Exception as e:
+        print(f"Failed to precompute popular items: {e}")
+        ml_models["popular_items"] = []
         
     yield
     ml_models.clear()
 
 app = FastAPI(lifespan=lifespan)
 
+# == ADMISSION CONTROL ==
+
+# Every endpoint is a sync handler sharing Starlette's threadpool (40 threads),
+# so requests are admitted per route family *before* they reach the pool.
+# The family limits add up to less than the pool size, so a burst of heavy
+# recommendation calls can't starve the cheap product/user lookups.
+
+POPULAR_POOL_SIZE = 100
+RESPONSE_CACHE_SIZE = 1024
+
+# (path prefix, limiter), first match wins so more specific prefixes go first
+admission_limiters = [
+    ("/api/recommend_", AdmissionLimiter("recommend", max_concurrent=4, max_queue=16, max_wait=2.0, degradable=True)),
+    ("/api/products/search", AdmissionLimiter("search", max_concurrent=8, max_queue=32, max_wait=0.5)),
+    ("/api/products", AdmissionLimiter("products", max_concurrent=16, max_queue=64, max_wait=1.0)),
+    ("/api/users", AdmissionLimiter("users", max_concurrent=8, max_queue=32, max_wait=1.0)),
+]
+
+# last successful personalized responses, served when the recommend family is saturated
+response_cache = ResponseCache(RESPONSE_CACHE_SIZE)
+
+def recommend_model_loaded(request):
+    # /api/recommend_{knn,svdpp,ncf,cbf}/...
+    family = request.url.path.split("/")[2]
+    return ml_models.get(family[len("recommend_"):]) is not None
+
+app.middleware("http")(admission_middleware(
+    admission_limiters,
+    response_cache,
+    lambda: ml_models.get("popular_items", []),
+    is_servable=recommend_model_loaded
+))
+
 origins = [
     "*"
 ]
@@ -193,6 +249,12 @@ def fetch_db_details(item_ids, scores):
             
     return {"recommendations": results}
 
+def decode_search_cursor(cursor):
+    try:
+        return decode_cursor(cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from None
+
 # == ENDPOINTS ==
 
 @app.get("/api/recommend_knn/{user_id}", tags=["Recommendations"])
@@ -568,6 +630,48 @@ def recommend_cbf_context(user_id: int, item_id: int, k: int = 10):
             
     return fetch_db_details(clean_ids, clean_scores)
 
+@app.get("/api/admission", tags=["Admission"])
+def get_admission_stats():
+    return admission_stats(admission_limiters, response_cache, ml_models.get("popular_items", []))
+
+# must be registered before /api/products/{item_id}, otherwise "search" is parsed as an item id
+@app.get("/api/products/search", tags=["Products"])
+def search_products(
+    q: str,
+    category: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    min_rating: Optional[float] = None,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+):
+    match = build_fts_query(q)
+    if match is None:
+        return {"query": q, "results": [], "next_cursor": None}
+
+    after = decode_search_cursor(cursor) if cursor is not None else None
+
+    conn = get_db_connection()
+    try:
+        results, next_key = search_items(
+            conn, match,
+            category=category,
+            min_price=min_price,
+            max_price=max_price,
+            min_rating=min_rating,
+            limit=limit,
+            after=after
+        )
+    except sqlite3.OperationalError as e:
+        if "no such table" in str(e):
+            raise HTTPException(status_code=503, detail="Search index not built, run ingestion.py")
+        raise
+    finally:
+        conn.close()
+
+    next_cursor = encode_cursor(*next_key) if next_key else None
+    return {"query": q, "results": results, "next_cursor": next_cursor}
+
 @app.get("/api/products/{item_id}", tags=["Products"])
 def get_product_details(item_id: int):
     conn = get_db_connection()
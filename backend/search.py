@@ -0,0 +1,142 @@
+import base64
+import json
+import math
+import re
+
+# BM25 column weights for items_fts (name, brandName, category)
+SEARCH_WEIGHTS = (10.0, 5.0, 2.0)
+
+# Full-text index over the searchable item fields, keyed by itemId (rowid).
+# Prefix indexes keep search-as-you-type queries ("toshi*") off the slow path.
+CREATE_SEARCH_INDEX = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS items_fts USING fts5(
+        name, brandName, category,
+        prefix='2 3 4',
+        tokenize='unicode61 remove_diacritics 2'
+    );
+"""
+
+# storefront verbs ("beli-laptop", "jual-flash-drives", "shop-televisi-digital");
+# every item has one, so indexing them would make "beli" match the whole catalog
+CATEGORY_PREFIX = re.compile(r"^(beli|jual|shop)-")
+
+def category_search_text(slug):
+    # the raw slug stays in items.category for the category= filter
+    return CATEGORY_PREFIX.sub("", slug).replace("-", " ")
+
+def build_search_documents(rows):
+    # items.csv has one row per (item, category) listing, so an item can show up
+    # under several categories; its document indexes all of them, space-joined
+    names = {}
+    categories = {}
+    for item_id, name, brand_name, category in rows:
+        item_id = int(item_id)
+        names[item_id] = (str(name), str(brand_name))
+        categories.setdefault(item_id, set()).add(category_search_text(str(category)))
+
+    return {
+        iid: (*names[iid], " ".join(sorted(categories[iid])))
+        for iid in names
+    }
+
+def sync_search_index(conn, documents):
+    # only rows that were added, changed or removed since the last run are touched;
+    # no 'optimize' afterwards, it would rewrite the whole index. FTS5 automerge
+    # keeps the segment count down as deltas accumulate.
+    cursor = conn.cursor()
+    cursor.execute(CREATE_SEARCH_INDEX)
+
+    indexed = {
+        row[0]: tuple(row[1:])
+        for row in cursor.execute("SELECT rowid, name, brandName, category FROM items_fts")
+    }
+
+    stale_ids = [iid for iid, fields in indexed.items() if documents.get(iid) != fields]
+    new_ids = [iid for iid, fields in documents.items() if indexed.get(iid) != fields]
+
+    cursor.executemany("DELETE FROM items_fts WHERE rowid = ?", [(iid,) for iid in stale_ids])
+    cursor.executemany(
+        "INSERT INTO items_fts(rowid, name, brandName, category) VALUES (?, ?, ?, ?)",
+        [(iid, *documents[iid]) for iid in new_ids]
+    )
+    conn.commit()
+
+    removed = sum(1 for iid in stale_ids if iid not in documents)
+    return len(new_ids), removed
+
+def build_fts_query(text):
+    # quote every token so user input can't inject FTS5 syntax,
+    # and prefix-match the last one for search-as-you-type
+    tokens = re.findall(r"\w+", text.lower())
+    if not tokens:
+        return None
+    terms = [f'"{t}"' for t in tokens]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+def encode_cursor(score, item_id):
+    raw = json.dumps([score, item_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+def decode_cursor(cursor):
+    # anything that isn't a (finite score, SQLite INTEGER itemId) pair we could
+    # have issued is rejected here, before it reaches the query
+    try:
+        score, item_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        score, item_id = float(score), int(item_id)
+    except (ValueError, TypeError, OverflowError, RecursionError):
+        raise ValueError("Invalid cursor") from None
+    if not math.isfinite(score) or not -2**63 <= item_id < 2**63:
+        raise ValueError("Invalid cursor")
+    return score, item_id
+
+def search_items(conn, match, category=None, min_price=None, max_price=None,
+                 min_rating=None, limit=20, after=None):
+    filters = []
+    params = [match]
+    if category is not None:
+        # checked against every listing of the item, not just the joined row
+        filters.append("EXISTS (SELECT 1 FROM items i2 WHERE i2.itemId = matches.itemId AND i2.category = ?)")
+        params.append(category)
+    if min_price is not None:
+        filters.append("items.price >= ?")
+        params.append(min_price)
+    if max_price is not None:
+        filters.append("items.price <= ?")
+        params.append(max_price)
+    if min_rating is not None:
+        filters.append("items.averageRating >= ?")
+        params.append(min_rating)
+
+    # keyset pagination on (score, itemId): lower BM25 score is a better match
+    if after is not None:
+        last_score, last_id = after
+        filters.append("(matches.score > ? OR (matches.score = ? AND matches.itemId > ?))")
+        params.extend([last_score, last_score, last_id])
+
+    where = f"WHERE {' AND '.join(filters)}" if filters else ""
+    query = f"""
+        WITH matches AS (
+            SELECT rowid AS itemId, bm25(items_fts, ?, ?, ?) AS score
+            FROM items_fts
+            WHERE items_fts MATCH ?
+        )
+        SELECT items.*, matches.score AS search_score
+        FROM matches
+        -- items.csv repeats itemIds (one row per category); return one row per item
+        JOIN items ON items.rowid = (
+            SELECT MAX(rowid) FROM items WHERE itemId = matches.itemId
+        )
+        {where}
+        ORDER BY matches.score, matches.itemId
+        LIMIT ?
+    """
+    # fetch one extra row to know whether there is a next page
+    rows = conn.execute(query, [*SEARCH_WEIGHTS, *params, limit + 1]).fetchall()
+
+    results = [dict(row) for row in rows[:limit]]
+    next_key = None
+    if len(rows) > limit:
+        last = results[-1]
+        next_key = (last["search_score"], last["itemId"])
+    return results, next_key
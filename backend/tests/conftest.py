@@ -0,0 +1,5 @@
+import os
+import sys
+
+# let tests import the backend modules (search, admission) directly
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
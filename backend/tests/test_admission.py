@@ -0,0 +1,129 @@
+import asyncio
+
+from admission import AdmissionLimiter
+
+def run(coro):
+    return asyncio.run(coro)
+
+def assert_drained(limiter):
+    assert limiter.in_flight == 0
+    assert limiter.queued == 0
+
+async def queue_up(limiter):
+    # start an acquire and let it reach the wait queue
+    task = asyncio.ensure_future(limiter.acquire())
+    await asyncio.sleep(0)
+    return task
+
+def test_rejects_when_queue_is_full():
+    async def scenario():
+        limiter = AdmissionLimiter("t", max_concurrent=1, max_queue=1, max_wait=5.0)
+        assert await limiter.acquire()
+        waiter = await queue_up(limiter)
+        assert limiter.queued == 1
+
+        assert not await limiter.acquire()
+
+        limiter.release(0.01)
+        assert await waiter
+        limiter.release(0.01)
+        assert_drained(limiter)
+    run(scenario())
+
+def test_rejects_when_estimated_wait_exceeds_deadline():
+    async def scenario():
+        limiter = AdmissionLimiter("t", max_concurrent=1, max_queue=10, max_wait=1.0)
+        limiter.avg_service_time = 5.0
+        assert await limiter.acquire()
+
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        assert not await limiter.acquire()
+        assert loop.time() - start < 0.5 # rejected up front, not after waiting
+        assert limiter.retry_after() >= 5
+
+        limiter.release(0.01)
+        assert_drained(limiter)
+    run(scenario())
+
+def test_waiter_times_out():
+    async def scenario():
+        limiter = AdmissionLimiter("t", max_concurrent=1, max_queue=10, max_wait=0.05)
+        limiter.avg_service_time = 0.01
+        assert await limiter.acquire()
+
+        assert not await limiter.acquire()
+        assert limiter.queued == 0
+
+        limiter.release(0.01)
+        assert_drained(limiter)
+    run(scenario())
+
+def test_waiter_cancelled_after_handoff_passes_slot_on():
+    async def scenario():
+        limiter = AdmissionLimiter("t", max_concurrent=1, max_queue=10, max_wait=5.0)
+        assert await limiter.acquire()
+        first = await queue_up(limiter)
+        second = await queue_up(limiter)
+
+        # hand the slot to the first waiter, then cancel it before it resumes
+        limiter.release(0.01)
+        first.cancel()
+        try:
+            # before 3.12 wait_for swallows the cancel once the slot was handed over
+            if await first:
+                limiter.release(0.01)
+        except asyncio.CancelledError:
+            pass
+
+        assert await second
+        assert limiter.in_flight == 1
+        limiter.release(0.01)
+        assert_drained(limiter)
+    run(scenario())
+
+def test_handoff_racing_timeout_keeps_slot():
+    async def scenario():
+        limiter = AdmissionLimiter("t", max_concurrent=1, max_queue=10, max_wait=5.0)
+        assert await limiter.acquire()
+
+        # the slot is handed over just as the wait times out
+        async def racing_wait_for(waiter, timeout):
+            limiter.release(0.01)
+            raise asyncio.TimeoutError
+
+        limiter.wait_for = racing_wait_for
+        assert await limiter.acquire()
+
+        assert limiter.in_flight == 1
+        limiter.release(0.01)
+        assert_drained(limiter)
+    run(scenario())
+
+def test_cancel_racing_handoff_passes_slot_on():
+    async def scenario():
+        limiter = AdmissionLimiter("t", max_concurrent=1, max_queue=10, max_wait=5.0)
+        assert await limiter.acquire()
+        second = None
+
+        # the slot is handed over just as the client goes away
+        async def racing_wait_for(waiter, timeout):
+            nonlocal second
+            limiter.wait_for = asyncio.wait_for # the next waiter waits normally
+            second = await queue_up(limiter)
+            limiter.release(0.01)
+            raise asyncio.CancelledError
+
+        limiter.wait_for = racing_wait_for
+        try:
+            await limiter.acquire()
+        except asyncio.CancelledError:
+            pass
+        else:
+            raise AssertionError("acquire should propagate the cancellation")
+
+        assert await second
+        assert limiter.in_flight == 1
+        limiter.release(0.01)
+        assert_drained(limiter)
+    run(scenario())
@@ -0,0 +1,147 @@
+import pytest
+
+pytest.importorskip("httpx")
+
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from admission import AdmissionLimiter, ResponseCache, admission_middleware, admission_stats
+
+POPULAR = [{"itemId": i} for i in range(100, 120)]
+
+@pytest.fixture
+def limiters():
+    return [
+        ("/api/recommend_", AdmissionLimiter("recommend", max_concurrent=1, max_queue=4, max_wait=1.0, degradable=True)),
+        ("/api/products", AdmissionLimiter("products", max_concurrent=1, max_queue=4, max_wait=1.0)),
+    ]
+
+@pytest.fixture
+def cache():
+    return ResponseCache(8)
+
+@pytest.fixture
+def client(limiters, cache):
+    # stand-in for main.app: same middleware, trivial handlers
+    app = FastAPI()
+    app.middleware("http")(admission_middleware(
+        limiters, cache, lambda: POPULAR,
+        is_servable=lambda request: not request.url.path.startswith("/api/recommend_off")
+    ))
+
+    @app.get("/api/recommend_test/{user_id}")
+    def recommend(user_id: int, k: int = 10):
+        return {"recommendations": [{"itemId": user_id}]}
+
+    @app.get("/api/recommend_test/{user_id}/context/{item_id}")
+    def recommend_context(user_id: int, item_id: int, k: int = 10):
+        return {"recommendations": [{"itemId": item_id + 1}]}
+
+    # a model that failed to load
+    @app.get("/api/recommend_off/{user_id}")
+    def recommend_off(user_id: int):
+        raise HTTPException(status_code=503, detail="Model not available")
+
+    @app.get("/api/products/{item_id}")
+    def product(item_id: int):
+        return {"itemId": item_id}
+
+    @app.get("/api/admission")
+    def stats():
+        return admission_stats(limiters, cache, POPULAR)
+
+    return TestClient(app)
+
+def saturate(limiter, avg_service_time=3.0):
+    # every slot busy and no room to queue, so the next acquire is rejected
+    limiter.in_flight = limiter.max_concurrent
+    limiter.max_queue = 0
+    limiter.avg_service_time = avg_service_time
+
+def test_admitted_request_passes_through(client, limiters):
+    response = client.get("/api/products/7")
+    assert response.status_code == 200
+    assert response.json() == {"itemId": 7}
+    assert limiters[1][1].in_flight == 0
+    assert limiters[1][1].admitted == 1
+
+def test_overloaded_family_is_shed_with_retry_after(client, limiters):
+    saturate(limiters[1][1])
+    response = client.get("/api/products/7")
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "3"
+    assert limiters[1][1].shed == 1
+
+def test_other_families_are_unaffected(client, limiters):
+    saturate(limiters[1][1])
+    response = client.get("/api/recommend_test/1")
+    assert response.status_code == 200
+    assert "degraded" not in response.json()
+
+def test_overloaded_recommend_degrades_to_popularity(client, limiters):
+    saturate(limiters[0][1])
+    response = client.get("/api/recommend_test/1?k=3")
+    assert response.status_code == 200
+    assert response.json() == {
+        "recommendations": POPULAR[:3],
+        "degraded": True,
+        "degraded_source": "popularity"
+    }
+    assert limiters[0][1].degraded == 1
+    assert limiters[0][1].shed == 0
+
+def test_overloaded_recommend_prefers_cached_response(client, limiters, cache):
+    assert client.get("/api/recommend_test/1?k=3").json() == {"recommendations": [{"itemId": 1}]}
+    assert len(cache) == 1
+
+    saturate(limiters[0][1])
+    cached = client.get("/api/recommend_test/1?k=3").json()
+    assert cached == {
+        "recommendations": [{"itemId": 1}],
+        "degraded": True,
+        "degraded_source": "cache"
+    }
+
+    # a different URL has nothing cached, so it falls back to popularity
+    other = client.get("/api/recommend_test/2?k=3").json()
+    assert other["degraded_source"] == "popularity"
+
+def test_popularity_fallback_skips_the_context_item(client, limiters):
+    saturate(limiters[0][1])
+    response = client.get(f"/api/recommend_test/1/context/{POPULAR[0]['itemId']}?k=3")
+    assert response.json()["recommendations"] == POPULAR[1:4]
+
+@pytest.mark.parametrize("path, status", [
+    ("/api/recommend_test/abc", 422),
+    ("/api/recommend_test/1?k=x", 422),
+    ("/api/recommend_nope/1", 404),
+    ("/api/recommend_off/1", 503),
+])
+def test_requests_that_fail_anyway_are_not_degraded(client, limiters, path, status):
+    saturate(limiters[0][1])
+    response = client.get(path)
+    assert response.status_code == status
+    assert limiters[0][1].degraded == 0
+
+def test_stats_report_queue_and_shed_counts(client, limiters):
+    client.get("/api/recommend_test/1")
+    saturate(limiters[1][1])
+    client.get("/api/products/7")
+
+    stats = client.get("/api/admission").json()
+    assert stats["cached_responses"] == 1
+    assert stats["popular_items"] == len(POPULAR)
+    assert stats["families"]["recommend"]["admitted"] == 1
+    assert stats["families"]["recommend"]["in_flight"] == 0
+    assert stats["families"]["recommend"]["queued"] == 0
+    assert stats["families"]["products"]["shed"] == 1
+
+def test_response_cache_evicts_least_recently_used():
+    cache = ResponseCache(2)
+    cache.put("a", b"1")
+    cache.put("b", b"2")
+    assert cache.get("a") == b"1"
+    cache.put("c", b"3")
+    assert cache.get("b") is None
+    assert cache.get("a") == b"1"
+    assert len(cache) == 2
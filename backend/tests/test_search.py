@@ -0,0 +1,127 @@
+import base64
+import csv
+import os
+import sqlite3
+
+import pytest
+
+from search import (
+    build_fts_query, build_search_documents, decode_cursor, encode_cursor, search_items,
+    sync_search_index
+)
+
+ITEMS_CSV = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "items.csv")
+
+@pytest.fixture(scope="module")
+def conn():
+    # same shape as ingestion.py: items loaded row-for-row from items.csv, then the index
+    with open(ITEMS_CSV, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    conn.execute("""
+        CREATE TABLE items (
+            itemId INTEGER, category TEXT, name TEXT, brandName TEXT, url TEXT,
+            price REAL, averageRating REAL, totalReviews INTEGER, retrievedDate TEXT
+        )
+    """)
+    conn.executemany(
+        "INSERT INTO items VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        [(int(r["itemId"]), r["category"], r["name"], r["brandName"], r["url"],
+          float(r["price"] or 0), float(r["averageRating"] or 0), int(r["totalReviews"] or 0),
+          r["retrievedDate"]) for r in rows]
+    )
+    conn.execute("CREATE INDEX idx_item_id ON items(itemId);")
+
+    documents = build_search_documents(
+        (r["itemId"], r["name"], r["brandName"], r["category"]) for r in rows
+    )
+    sync_search_index(conn, documents)
+    yield conn
+    conn.close()
+
+def search_all(conn, match, page_size=50, **filters):
+    ids = []
+    after = None
+    while True:
+        results, after = search_items(conn, match, limit=page_size, after=after, **filters)
+        ids.extend(r["itemId"] for r in results)
+        if after is None:
+            return ids
+
+def items_in_category(conn, category):
+    rows = conn.execute("SELECT DISTINCT itemId FROM items WHERE category = ?", (category,))
+    return {row["itemId"] for row in rows}
+
+@pytest.mark.parametrize("category", ["beli-laptop", "beli-smart-tv", "beli-harddisk-eksternal"])
+def test_category_filter_returns_every_matching_item(conn, category):
+    match = build_fts_query("a")
+    expected = set(search_all(conn, match)) & items_in_category(conn, category)
+    assert expected
+
+    found = search_all(conn, match, category=category)
+    assert len(found) == len(set(found))
+    assert set(found) == expected
+
+def test_every_category_of_an_item_is_searchable(conn):
+    found = set(search_all(conn, build_fts_query("laptop")))
+    assert items_in_category(conn, "beli-laptop") <= found
+
+def test_storefront_prefix_is_not_indexed(conn):
+    for word in ("beli", "jual", "shop"):
+        rows = conn.execute(
+            "SELECT COUNT(*) FROM items_fts WHERE items_fts MATCH ?", (f'category:"{word}"',)
+        ).fetchone()
+        assert rows[0] == 0
+
+def test_pagination_matches_single_query(conn):
+    match = build_fts_query("s")
+    everything, _ = search_items(conn, match, limit=100000)
+    assert search_all(conn, match, page_size=37) == [r["itemId"] for r in everything]
+
+def test_sync_only_touches_changed_rows():
+    conn = sqlite3.connect(":memory:")
+    documents = build_search_documents([
+        (1, "Toshiba TV", "Toshiba", "beli-smart-tv"),
+        (1, "Toshiba TV", "Toshiba", "beli-televisi"),
+        (2, "Seagate HDD", "Seagate", "beli-harddisk-eksternal"),
+    ])
+    assert documents[1][2] == "smart tv televisi"
+    assert sync_search_index(conn, documents) == (2, 0)
+    assert sync_search_index(conn, documents) == (0, 0)
+
+    documents[2] = ("Seagate HDD 2TB", "Seagate", "beli-harddisk-eksternal")
+    assert sync_search_index(conn, documents) == (1, 0)
+
+    del documents[1]
+    assert sync_search_index(conn, documents) == (0, 1)
+    assert conn.execute("SELECT rowid FROM items_fts").fetchall() == [(2,)]
+
+def raw_cursor(text):
+    return base64.urlsafe_b64encode(text.encode()).decode()
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(-8.326853117734174, 100002528)) == (-8.326853117734174, 100002528)
+
+@pytest.mark.parametrize("cursor", [
+    "!!!",
+    raw_cursor("[1]"),
+    raw_cursor("5"),
+    raw_cursor("[null, 1]"),
+    raw_cursor('["x", 1]'),
+    raw_cursor("[0, 99999999999999999999999]"),
+    raw_cursor("[0, -9223372036854775809]"),
+    raw_cursor("[1e999, 1]"),
+    raw_cursor("[NaN, 1]"),
+    raw_cursor("[" + "9" * 400 + ", 1]"),
+    raw_cursor("[" * 100000),
+])
+def test_bad_cursor_is_rejected(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+def test_cursor_at_integer_bounds_reaches_query(conn):
+    match = build_fts_query("laptop")
+    for item_id in (-2**63, 2**63 - 1):
+        search_items(conn, match, after=decode_cursor(raw_cursor(f"[0, {item_id}]")))
@@ -52,6 +52,37 @@ export async function getProductDetail(itemId) {
   }
 }
 
+/**
+ * Full-text search over product name, brand and category
+ * @param {string} query - Search text (last word is prefix-matched)
+ * @param {Object} filters - Optional { category, minPrice, maxPrice, minRating, limit, cursor }
+ * @returns {Promise<Object>} { results, next_cursor }
+ */
+export async function searchProducts(query, filters = {}) {
+  try {
+    const response = await apiClient.get('/products/search', {
+      params: {
+        q: query,
+        category: filters.category,
+        min_price: filters.minPrice,
+        max_price: filters.maxPrice,
+        min_rating: filters.minRating,
+        limit: filters.limit,
+        cursor: filters.cursor,
+      },
+    });
+    return {
+      results: response.data.results || [],
+      next_cursor: response.data.next_cursor || null,
+    };
+  } catch (error) {
+    console.error(`Failed to search products for "${query}":`, error);
+    throw new Error(
+      error.response?.data?.message || 'Gagal mencari produk'
+    );
+  }
+}
+
 /**
  * Get all users from database
  * @returns {Promise<Array>} Array of user objects